@@ -2,15 +2,19 @@
 import os
 import streamlit as st
 from streamlit_mic_recorder import mic_recorder
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from transformers import pipeline, AutoTokenizer
-import tempfile
-import nltk
+import io
+import re
+import hashlib
+import av
+import numpy as np
 from datetime import datetime
 import json
-
-# ---- Force NLTK download ----
-nltk.download('punkt', quiet=True)
-nltk.download('punkt_tab', quiet=True)
+import gc
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # ---- Page Configuration ----
 st.set_page_config(
@@ -21,207 +25,305 @@ st.set_page_config(
 )
 
 # ---- Custom CSS ----
-st.markdown("""
-<style>
-    .main-header {
-        background: linear-gradient(135deg, #4a148c 0%, #1e3c72 100%);
-        padding: 2rem;
-        border-radius: 10px;
-        text-align: center;
-        margin-bottom: 2rem;
-        color: #ffffff;
-    }
-
-    .main-header h1 {
-        margin: 0;
-        font-size: 2.5rem;
-        font-weight: 700;
-    }
-
-    .subtitle {
-        margin: 0.5rem 0 0 0;
-        font-size: 1.1rem;
-        opacity: 0.85;
-        color: #e0e0e0;
-    }
-
-    .section-header {
-        font-size: 1.5rem;
-        font-weight: 600;
-        color: #e0e0e0;
-        margin: 2rem 0 1rem 0;
-        padding-bottom: 0.5rem;
-        border-bottom: 3px solid #3498db;
-    }
-
-    .custom-card {
-        background: #1e1e1e;
-        border-radius: 10px;
-        padding: 1.5rem;
-        margin: 1rem 0;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.4);
-        border-left: 4px solid #3498db;
-    }
-
-    .card-header {
-        font-size: 1.3rem;
-        font-weight: 600;
-        color: #f5f5f5;
-        margin-bottom: 0.5rem;
-    }
-
-    .card-subtitle {
-        color: #aaaaaa;
-        margin-bottom: 1rem;
-    }
-
-    .processing-section {
-        background: #2a2a2a;
-        border-radius: 10px;
-        padding: 2rem;
-        margin: 1rem 0;
-    }
-
-    .transcription-text {
-        background: #2a2a2a;
-        padding: 1rem;
-        border-radius: 5px;
-        border-left: 4px solid #17a2b8;
-        font-family: 'Courier New', monospace;
-        line-height: 1.6;
-        max-height: 300px;
-        overflow-y: auto;
-        color: #e0e0e0;
-    }
-
-    .summary-text {
-        background: #3a2f0b;
-        padding: 1rem;
-        border-radius: 5px;
-        border-left: 4px solid #ffc107;
-        line-height: 1.6;
-        color: #f5f5f5;
-    }
-
-    .flashcard {
-        background: #1e1e1e;
-        border: 1px solid #444;
-        border-radius: 8px;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.3);
-        transition: transform 0.2s ease;
-    }
-
-    .flashcard:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.5);
-    }
-
-    .flashcard-number {
-        font-size: 0.9rem;
-        color: #bbbbbb;
-        font-weight: 500;
-        margin-bottom: 0.5rem;
-    }
-
-    .flashcard-question {
-        background: #102542;
-        padding: 0.75rem;
-        border-radius: 5px;
-        margin-bottom: 0.5rem;
-        border-left: 3px solid #3498db;
-        color: #e0e0e0;
-    }
-
-    .flashcard-answer {
-        background: #0f3d27;
-        padding: 0.75rem;
-        border-radius: 5px;
-        border-left: 3px solid #28a745;
-        color: #e0e0e0;
-    }
-
-    .footer {
-        margin-top: 3rem;
-        padding: 2rem 0;
-        text-align: center;
-        color: #aaaaaa;
-        border-top: 1px solid #444;
-    }
-
-    @media (max-width: 768px) {
-        .main-header h1 {
-            font-size: 2rem;
-        }
-
-        .custom-card {
-            margin: 0.5rem 0;
-            padding: 1rem;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+# Kept in static/app.css and read once per process. It has to be inlined: Streamlit's static
+# serving sends .css as text/plain with nosniff, so browsers refuse a <link>ed stylesheet.
+@st.cache_data(show_spinner=False)
+def _css():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "app.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+st.markdown(_css(), unsafe_allow_html=True)
 
 
 # ---- State Management ----
-for key in ["audio_data", "file_name", "transcription", "summary", "flashcards"]:
+for key in ["audio_data", "file_name", "transcription", "sentences", "summary", "flashcards"]:
     if key not in st.session_state: st.session_state[key] = None
 
 def reset_app():
     # Define the keys you want to clear
-    keys_to_clear = ["audio_data", "file_name", "transcription", "summary", "flashcards"]
+    keys_to_clear = ["audio_data", "file_name", "transcription", "sentences", "summary", "flashcards"]
     for key in keys_to_clear:
         if key in st.session_state:
             del st.session_state[key]
 
 # ---- AI Models (Cached) ----
-@st.cache_resource
+# int8 ONNX exports produced offline with optimum-cli (see README). Without them the checkpoint is
+# exported once to the fp32 ONNX dir, so later starts never load the PyTorch weights again.
+SUMMARY_MODEL = os.environ.get("SUMMARY_MODEL", "t5-small")
+# Export dirs are named after the model so a different SUMMARY_MODEL never picks up another model's graph
+SUMMARY_ONNX_DIR = os.environ.get("SUMMARY_ONNX_DIR", SUMMARY_MODEL.replace('/', '--') + "_onnx")
+SUMMARY_INT8_DIR = os.environ.get("SUMMARY_INT8_DIR", SUMMARY_MODEL.replace('/', '--') + "_int8")
+QG_MODEL = "valhalla/t5-small-qg-hl"
+QG_ONNX_DIR = "t5qg_onnx"
+QG_INT8_DIR = "t5qg_int8"
+# Speech-to-text backend: "faster-whisper" (default) or "whispercpp" (needs `pip install pywhispercpp`)
+WHISPER_BACKEND = os.environ.get("WHISPER_BACKEND", "faster-whisper")
+WHISPERCPP_MODEL = os.environ.get("WHISPERCPP_MODEL", "base-q5_1")
+
+def load_ort_pipeline(task, model_id, onnx_dir, int8_dir):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    if os.path.isdir(int8_dir):
+        model = ORTModelForSeq2SeqLM.from_pretrained(int8_dir)
+    elif os.path.isdir(onnx_dir):
+        model = ORTModelForSeq2SeqLM.from_pretrained(onnx_dir)
+    else:
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_id, export=True)
+        model.save_pretrained(onnx_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    return pipeline(task, model=model, tokenizer=tokenizer)
+
+@st.cache_resource(max_entries=1)
 def load_models():
-    summarizer = pipeline("summarization", model="t5-small")
-    qg_pipe = pipeline("text2text-generation", model="valhalla/t5-small-qg-hl")
+    summarizer = load_ort_pipeline("summarization", SUMMARY_MODEL, SUMMARY_ONNX_DIR, SUMMARY_INT8_DIR)
+    qg_pipe = load_ort_pipeline("text2text-generation", QG_MODEL, QG_ONNX_DIR, QG_INT8_DIR)
     return summarizer, qg_pipe
 
 @st.cache_resource
+def model_locks():
+    # One lock per T5 pipeline, shared by every session and worker thread: a pipeline call
+    # toggles truncation on its fast tokenizer, which races ("Already borrowed") when two
+    # threads use the same pipeline at once
+    return threading.Lock(), threading.Lock()
+
+@st.cache_resource(max_entries=1)
+def load_count_tokenizer():
+    # Separate summarizer tokenizer (and lock) for token counting, so counting never waits on
+    # or races with a running summary
+    return AutoTokenizer.from_pretrained(SUMMARY_MODEL), threading.Lock()
+
+@st.cache_resource
+def whispercpp_lock():
+    # The cached whisper.cpp context is shared by all sessions but is not safe for concurrent
+    # use, and pywhispercpp keeps new_segment_callback at class level; one transcription at a time
+    return threading.Lock()
+
+@st.cache_resource(max_entries=1)
 def load_whisper():
-    import whisper
-    return whisper.load_model("base")
+    if WHISPER_BACKEND == "whispercpp":
+        # ggml-quantized whisper.cpp: smaller RAM footprint for CPU-only hosts
+        from pywhispercpp.model import Model
+        return Model(WHISPERCPP_MODEL, n_threads=os.cpu_count(), redirect_whispercpp_logs_to=None)
+    import ctranslate2
+    from faster_whisper import WhisperModel
+    # fp16 on GPU when one is visible, int8 weights on CPU otherwise
+    if ctranslate2.get_cuda_device_count() > 0:
+        return WhisperModel("base", device="cuda", compute_type="float16")
+    return WhisperModel("base", device="cpu", compute_type="int8")
+
+@st.cache_resource
+def preload_models():
+    # Warm the model caches in the background once per process so the first analysis skips the cold start
+    ready = threading.Event()
+    def _load():
+        try:
+            load_whisper()
+            load_count_tokenizer()
+            summarizer, qg_pipe = load_models()
+            # First inference allocates ORT buffers; pay that here rather than on the first request
+            summary_lock, qg_lock = model_locks()
+            with summary_lock: summarizer("warm up", max_length=8, min_length=1)
+            with qg_lock: qg_pipe("warm up", max_length=8)
+        except Exception: pass  # surfaced again when the models are first used
+        finally: ready.set()
+    threading.Thread(target=_load, daemon=True).start()
+    return ready
+
+models_ready = preload_models()
+
+def free_models():
+    # Drop the cached Whisper/T5 models so a memory-constrained host gets the RAM back;
+    # they are reloaded lazily on the next analysis
+    load_whisper.clear()
+    load_models.clear()
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available(): torch.cuda.empty_cache()
+    except ImportError: pass
 
 # ---- Functions ----
-def transcribe_with_whisper(audio_bytes):
-    with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f:
-        f.write(audio_bytes)
-        temp_path = f.name
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+
+MAX_FLASHCARDS = 10
+SUMMARY_CHUNK_TOKENS = 400
+SUMMARY_CHUNK_OVERLAP = 50
+SUMMARY_SECTION_TOKENS = SUMMARY_CHUNK_TOKENS - SUMMARY_CHUNK_OVERLAP
+
+def count_tokens(text):
+    tokenizer, lock = load_count_tokenizer()
+    with lock: return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+class SectionSplitter:
+    # Greedy sentence-bounded sections of about one summary chunk. Both the streaming path and
+    # _summarize cut sections with this, so the same transcript always yields the same summary.
+    def __init__(self):
+        self.current, self.tokens = [], 0
+
+    def add(self, sentence):
+        self.current.append(sentence)
+        self.tokens += count_tokens(sentence)
+        if self.tokens < SUMMARY_SECTION_TOKENS: return None
+        section, self.current, self.tokens = " ".join(self.current), [], 0
+        return section
+
+def decode_audio(audio_bytes, sampling_rate=16000):
+    # Decode and resample in-process to the 16 kHz mono float32 array Whisper expects
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=sampling_rate)
+    chunks = []
+    with av.open(io.BytesIO(audio_bytes)) as container:
+        for frame in container.decode(audio=0):
+            for rs in resampler.resample(frame): chunks.append(rs.to_ndarray().ravel())
+        for rs in resampler.resample(None): chunks.append(rs.to_ndarray().ravel())
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+# Model outputs are cached on content so identical audio/text never hits the models twice.
+# Cached helpers raise instead of reporting, so failures are not cached.
+@st.cache_data(show_spinner=False, max_entries=32)
+def _transcribe(audio_hash, _audio_bytes, _on_segment=None):
+    model = load_whisper()
+    texts = []
+    def emit(seg):
+        texts.append(seg.text.strip())
+        if _on_segment: _on_segment(texts[-1])
+    if WHISPER_BACKEND == "whispercpp":
+        # whisper.cpp returns a finished list; its callback is what fires while decoding
+        audio = decode_audio(_audio_bytes)
+        with whispercpp_lock(): model.transcribe(audio, new_segment_callback=emit)
+    else:
+        segments, _ = model.transcribe(decode_audio(_audio_bytes), beam_size=1, vad_filter=True)
+        for seg in segments: emit(seg)
+    return " ".join(texts)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _summarize_chunks(text):
+    # Map step: summarize overlapping chunks of the text in one batch
+    summarizer, _ = load_models()
+    tokenizer = summarizer.tokenizer
+    with model_locks()[0]:
+        ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        step = SUMMARY_CHUNK_TOKENS - SUMMARY_CHUNK_OVERLAP
+        chunks = [tokenizer.decode(ids[i:i + SUMMARY_CHUNK_TOKENS]) for i in range(0, max(len(ids) - SUMMARY_CHUNK_OVERLAP, 1), step)]
+        partials = summarizer(chunks, batch_size=len(chunks), max_length=80, min_length=20, do_sample=False, truncation=True)
+    return " ".join(p['summary_text'] for p in partials)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _summarize(text):
+    summarizer, _ = load_models()
+    # Map-reduce for transcripts that don't fit the model's input: summarize sentence-bounded
+    # sections, keep the short tail as-is, then reduce until the result fits for the final pass
+    if count_tokens(text) > SUMMARY_CHUNK_TOKENS:
+        splitter = SectionSplitter()
+        sections = [sec for sec in map(splitter.add, SENTENCE_RE.split(text.strip())) if sec]
+        text = " ".join([_summarize_chunks(sec) for sec in sections] + splitter.current)
+        while count_tokens(text) > SUMMARY_CHUNK_TOKENS:
+            text = _summarize_chunks(text)
+    with model_locks()[0]:
+        return summarizer(text, max_length=150, min_length=40, do_sample=False)[0]['summary_text']
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _make_flashcards(good_sentences):
+    _, qg_pipe = load_models()
+    with model_locks()[1]:
+        outputs = qg_pipe(good_sentences, batch_size=len(good_sentences), max_length=64, do_sample=False,
+                          num_beams=1, no_repeat_ngram_size=3, truncation=True)
+    return [{"question": o['generated_text'].strip(), "answer": s.strip()} for o, s in zip(outputs, good_sentences)]
+
+def transcribe_with_whisper(audio_bytes, on_segment=None):
     try:
-        model = load_whisper()
-        result = model.transcribe(temp_path, fp16=False)
-        return result["text"]
+        return _transcribe(hashlib.blake2b(audio_bytes, digest_size=16).hexdigest(), audio_bytes, on_segment)
     except Exception as e:
         st.error(f"Transcription failed: {e}")
         return None
-    finally:
-        try: os.remove(temp_path)
-        except: pass
 
 def generate_summary(text):
-    summarizer, _ = load_models()
     try:
-        return summarizer(text, max_length=150, min_length=40, do_sample=False)[0]['summary_text']
+        return _summarize(text)
     except Exception as e:
         st.error(f"Summary failed: {e}")
         return None
 
-def generate_flashcards(text):
-    _, qg_pipe = load_models()
-    sentences = nltk.sent_tokenize(text)
-    good_sentences = [s for s in sentences if 10 < len(s.split()) < 50]
-    flashcards = []
-    for s in good_sentences[:10]:
+def pick_flashcard_sentences(sentences):
+    # Word count via space count: a C-level scan with no per-sentence list allocation
+    return [s for s in sentences if 10 < s.count(' ') + 1 < 50]
+
+def generate_flashcards(sentences):
+    good_sentences = pick_flashcard_sentences(sentences)[:MAX_FLASHCARDS]
+    if not good_sentences: return []
+    try:
+        return _make_flashcards(good_sentences)
+    except Exception as e:
+        st.error(f"Flashcard generation failed: {e}")
+        return []
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _export_cards(cards_tuple):
+    cards = [dict(c) for c in cards_tuple]
+    flashcard_text = "\n\n".join(f"Q: {c['question']}\nA: {c['answer']}" for c in cards)
+    return flashcard_text, json.dumps(cards, separators=(',', ':'))
+
+def stream_transcription(audio_bytes, live):
+    # Show Whisper segments as they are decoded and, while the rest of the audio is still being
+    # transcribed, start flashcards on every finished paragraph and the summary's map step on
+    # every finished section. Sections are cut exactly as _summarize cuts them, so this only fills
+    # _summarize_chunks' cache early; the summary itself is the same as for a cache hit.
+    # Returns (transcription, flashcards); flashcards is None when nothing was streamed (cache hit).
+    segments = queue.Queue()
+    parts, pending, card_futures, picked = [], [], [], 0
+    splitter, tail, finished, early_summary = SectionSplitter(), "", [], True
+
+    def submit_cards(ex):
+        nonlocal pending, picked
+        good = pick_flashcard_sentences(SENTENCE_RE.split(" ".join(pending)))[:MAX_FLASHCARDS - picked]
+        if good:
+            card_futures.append(ex.submit(generate_flashcards, good))
+            picked += len(good)
+        pending = []
+
+    def submit_sections(ex):
+        # Only once the background preload is done, so the UI loop never loads a model itself;
+        # sentences finished before then are caught up on the next segment
+        nonlocal finished, early_summary
+        if not models_ready.is_set(): return
         try:
-            q = qg_pipe(s, max_length=64, do_sample=True)[0]['generated_text']
-            flashcards.append({"question": q.strip(), "answer": s.strip()})
-        except: continue
-    return flashcards
+            for sentence in finished:
+                section = splitter.add(sentence)
+                if section: ex.submit(_summarize_chunks, section)  # errors resurface in generate_summary
+        except Exception:
+            early_summary = False
+        finished = []
+
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=3, initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        text_future = ex.submit(transcribe_with_whisper, audio_bytes, segments.put)
+        while not (text_future.done() and segments.empty()):
+            try: seg = segments.get(timeout=0.1)
+            except queue.Empty: continue
+            parts.append(seg)
+            pending.append(seg)
+            live.markdown(f'<div class="transcription-text">{" ".join(parts)}</div>', unsafe_allow_html=True)
+            if seg.endswith(('.', '?', '!')) and len(pending) > 3 and picked < MAX_FLASHCARDS:
+                submit_cards(ex)
+            # Every sentence but the last is final: a later segment can only extend the last one
+            *done, tail = SENTENCE_RE.split(f"{tail} {seg}" if tail else seg)
+            finished += done
+            if early_summary: submit_sections(ex)
+        transcription = text_future.result()
+        if not parts or not transcription: return transcription, None
+        if pending and picked < MAX_FLASHCARDS: submit_cards(ex)
+        return transcription, [c for f in card_futures for c in f.result()]
+
+def analyze(text, flashcards=None):
+    # Segment once and share the sentences between both generators
+    if st.session_state.sentences is None:
+        st.session_state.sentences = SENTENCE_RE.split(text.strip())
+    # Summary and flashcards only depend on the text, so run them side by side;
+    # ONNX Runtime releases the GIL during inference
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=2, initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        summary_future = ex.submit(generate_summary, text)
+        if flashcards is None:
+            flashcards = ex.submit(generate_flashcards, st.session_state.sentences).result()
+        return summary_future.result(), flashcards
 
 # ---- Main UI ----
 st.markdown("""
@@ -231,6 +333,9 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+if not models_ready.is_set():
+    st.caption("⏳ Loading models in the background…")
+
 if st.session_state.audio_data is None:
     st.markdown('<div class="section-header">📥 Input Your Lecture</div>', unsafe_allow_html=True)
     col1, col2 = st.columns(2)
@@ -262,50 +367,49 @@ else:
 
     if st.session_state.transcription is None:
         with st.spinner("⏳ Processing audio..."):
-            transcription = transcribe_with_whisper(st.session_state.audio_data)
+            transcription, flashcards = stream_transcription(st.session_state.audio_data, st.empty())
             st.session_state.transcription = transcription
             if transcription:
-                st.session_state.summary = generate_summary(transcription)
-                st.session_state.flashcards = generate_flashcards(transcription)
+                st.session_state.summary, st.session_state.flashcards = analyze(transcription, flashcards)
                 st.balloons()
                 st.rerun()
     else:
         # --- Results ---
+        now = datetime.now()
+        ts = now.strftime('%Y%m%d_%H%M%S')
         with st.expander("📝 Full Transcription"):
             st.markdown(f'<div class="transcription-text">{st.session_state.transcription}</div>', unsafe_allow_html=True)
-            st.download_button("📄 Download Transcription", st.session_state.transcription, f"transcription_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+            st.download_button("📄 Download Transcription", st.session_state.transcription, f"transcription_{ts}.txt")
 
         if st.session_state.summary:
             st.markdown('<div class="custom-card"><b>📋 Summary</b><br>Key lecture points</div>', unsafe_allow_html=True)
             st.markdown(f'<div class="summary-text">{st.session_state.summary}</div>', unsafe_allow_html=True)
-            st.download_button("📄 Download Summary", st.session_state.summary, f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+            st.download_button("📄 Download Summary", st.session_state.summary, f"summary_{ts}.txt")
 
         if st.session_state.flashcards:
             with st.expander("🎯 Study Flashcards", expanded=True):
-                for i, card in enumerate(st.session_state.flashcards, 1):
-                    st.markdown(f"""
+                st.markdown("".join(f"""
                     <div class="flashcard">
                         <div><b>Card {i}</b></div>
                         <div class="flashcard-question"><strong>Q:</strong> {card['question']}</div>
                         <div class="flashcard-answer"><strong>A:</strong> {card['answer']}</div>
                     </div>
-                    """, unsafe_allow_html=True)
+                    """ for i, card in enumerate(st.session_state.flashcards, 1)), unsafe_allow_html=True)
 
-                flashcard_text = "\n\n".join([f"Q: {c['question']}\nA: {c['answer']}" for c in st.session_state.flashcards])
-                flashcard_json = json.dumps(st.session_state.flashcards, indent=2)
+                flashcard_text, flashcard_json = _export_cards(tuple(tuple(c.items()) for c in st.session_state.flashcards))
 
-                st.download_button("📄 Flashcards (TXT)", flashcard_text, f"flashcards_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
-                st.download_button("📚 Flashcards (JSON)", flashcard_json, f"flashcards_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+                st.download_button("📄 Flashcards (TXT)", flashcard_text, f"flashcards_{ts}.txt")
+                st.download_button("📚 Flashcards (JSON)", flashcard_json, f"flashcards_{ts}.json")
 
         st.markdown("---")
-        col1, col2 = st.columns([1,1])
+        col1, col2, col3 = st.columns([1,1,1])
         with col1: st.button("🔄 Start Over", on_click=reset_app)
+        with col3: st.button("🧹 Free Models", on_click=free_models, help="Release cached AI models from memory")
         with col2:
             if st.button("📊 Export All"):
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 full_report = f"""LECTURE ANALYSIS REPORT
 File: {st.session_state.file_name}
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}
 
 === TRANSCRIPTION ===
 {st.session_state.transcription}
@@ -314,10 +418,8 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 {st.session_state.summary or 'No summary'}
 
 === FLASHCARDS ===
-"""
-                for i, card in enumerate(st.session_state.flashcards or []):
-                    full_report += f"\nCard {i+1}\nQ: {card['question']}\nA: {card['answer']}\n"
-                st.download_button("📥 Download Report", full_report, f"lecture_analysis_{timestamp}.txt")
+""" + "".join(f"\nCard {i}\nQ: {card['question']}\nA: {card['answer']}\n" for i, card in enumerate(st.session_state.flashcards or [], 1))
+                st.download_button("📥 Download Report", full_report, f"lecture_analysis_{ts}.txt")
 
 # ---- Footer ----
 st.markdown("""